@@ -142,6 +142,8 @@ metadata_rebuild_jobs = hari.trigger_dataset_metadata_rebuild_job(
 
 # track the status of all metadata rebuild jobs and wait for them to finish
 job_statuses = []
+# poll often at first to detect short jobs quickly, then back off for long-running ones
+poll_interval = 0.5
 jobs_are_still_running = True
 while jobs_are_still_running:
     jobs = hari.get_processing_jobs(trace_id=metadata_rebuild_trace_id)
@@ -156,6 +158,7 @@ while jobs_are_still_running:
     )
     if jobs_are_still_running:
         print(f"waiting for metadata_rebuild jobs to finish, {job_statuses=}")
-        time.sleep(10)
+        time.sleep(poll_interval)
+        poll_interval = min(10.0, poll_interval * 1.5)
 
 print(f"metadata_rebuild jobs finished with status {job_statuses=}")
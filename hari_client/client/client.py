@@ -1,6 +1,11 @@
+import concurrent.futures
 import datetime
+import functools
 import json
 import pathlib
+import random
+import threading
+import time
 import types
 import typing
 import uuid
@@ -19,6 +24,14 @@ T = typing.TypeVar("T")
 
 log = logger.setup_logger(__name__)
 
+# Adapters to serialize a whole batch of a bulk endpoint to JSON with a single call.
+# serialize_as_any has to be used with them, so that every item is serialized
+# according to its actual (sub)class, e.g. HARIMedia, exactly like item.model_dump() would.
+_MEDIA_CREATE_LIST_ADAPTER = pydantic.TypeAdapter(list[models.MediaCreate])
+_MEDIA_OBJECT_CREATE_LIST_ADAPTER = pydantic.TypeAdapter(list[models.MediaObjectCreate])
+_ATTRIBUTE_CREATE_LIST_ADAPTER = pydantic.TypeAdapter(list[models.AttributeCreate])
+_JSON_CONTENT_TYPE_HEADER = {"Content-Type": "application/json"}
+
 
 class CustomJSONEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -29,6 +42,13 @@ class CustomJSONEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+@functools.lru_cache(maxsize=256)
+def _get_type_adapter(type_: typing.Any) -> pydantic.TypeAdapter:
+    """Returns a TypeAdapter for the type. The adapters are cached, because building
+    their validators is expensive compared to validating the data itself."""
+    return pydantic.TypeAdapter(type_)
+
+
 def _parse_response_model(
     response_data: typing.Any, response_model: typing.Type[T]
 ) -> T:
@@ -91,7 +111,10 @@ def _parse_response_model(
                 elif isinstance(item_type, type) and issubclass(
                     item_type, pydantic.BaseModel
                 ):
-                    return [item_type(**item) for item in response_data]
+                    # validates the whole list in one call instead of item by item
+                    return _get_type_adapter(response_model).validate_python(
+                        response_data
+                    )
                 else:
                     return [item_type(item) for item in response_data]
         if origin is dict:
@@ -188,6 +211,9 @@ def _prepare_request_query_params(
 
 class HARIClient:
     BULK_UPLOAD_LIMIT = 500
+    # the number of connections kept alive per host; large enough to serve all
+    # concurrent batch uploads of the HARIUploader without reopening connections
+    CONNECTION_POOL_SIZE = 16
 
     def __init__(self, config: config.Config):
         self.config = config
@@ -196,6 +222,52 @@ class HARIClient:
         # expiry is reset on every token refresh with the expiry time provided by the server
         self.expiry = datetime.datetime.fromtimestamp(0)
         self.session = requests.Session()
+        pool_adapter = adapters.HTTPAdapter(
+            pool_connections=HARIClient.CONNECTION_POOL_SIZE,
+            pool_maxsize=HARIClient.CONNECTION_POOL_SIZE,
+        )
+        self.session.mount("https://", pool_adapter)
+        self.session.mount("http://", pool_adapter)
+        # the media files are uploaded to the cloud storage with a separate session,
+        # because it must not send the HARI authorization header.
+        # It's reused for all uploads, so that its connections are kept alive across batches.
+        self._media_files_upload_session = self._create_media_files_upload_session()
+
+    @staticmethod
+    def _create_media_files_upload_session() -> requests.Session:
+        """Creates a session with retry mechanism for uploading media files with presigned urls."""
+        session = requests.Session()
+        # due to the SSLEOFError obscuring the underlying error response from the cloud provider, we don't know
+        # which status code to retry on. Therefore we retry on every 5xx codes, as well as the
+        # two default 4xx codes.
+        retries = adapters.Retry(
+            total=5,
+            backoff_factor=0.1,
+            status_forcelist=[
+                413,
+                429,
+                500,
+                501,
+                502,
+                503,
+                504,
+                505,
+                506,
+                507,
+                508,
+                510,
+                511,
+            ],
+        )
+        session.mount(
+            "https://",
+            adapters.HTTPAdapter(
+                max_retries=retries,
+                pool_connections=HARIClient.CONNECTION_POOL_SIZE,
+                pool_maxsize=HARIClient.CONNECTION_POOL_SIZE,
+            ),
+        )
+        return session
 
     def _request(
         self,
@@ -380,32 +452,6 @@ class HARIClient:
                 files_by_file_extension[file_extension] = []
             files_by_file_extension[file_extension].append((idx, file_path))
 
-        # set up the session with retry mechanism
-        session = requests.Session()
-        # due to the SSLEOFError obscuring the underlying error response from the cloud provider, we don't know
-        # which status code to retry on. Therefore we retry on every 5xx codes, as well as the
-        # two default 4xx codes.
-        retries = adapters.Retry(
-            total=5,
-            backoff_factor=0.1,
-            status_forcelist=[
-                413,
-                429,
-                500,
-                501,
-                502,
-                503,
-                504,
-                505,
-                506,
-                507,
-                508,
-                510,
-                511,
-            ],
-        )
-        session.mount("https://", adapters.HTTPAdapter(max_retries=retries))
-
         for (
             file_extension,
             file_extension_file_paths,
@@ -423,7 +469,7 @@ class HARIClient:
                     file_path[0]
                 ] = presign_response_batch[idx]
                 self._upload_file(
-                    session=session,
+                    session=self._media_files_upload_session,
                     file_path=file_path[1],
                     upload_url=presign_response_batch[idx].upload_url,
                 )
@@ -899,23 +945,20 @@ class HARIClient:
                 dataset_id, file_paths=file_paths
             )
 
-            # 2. set media_urls on medias and parse them to dicts
-            media_dicts = []
+            # 2. set media_urls on medias
             for idx, media in enumerate(medias):
                 media.media_url = media_upload_responses[idx].media_url
-                media_dicts.append(media.model_dump())
         else:
-            media_dicts = []
             for media in medias:
                 if not media.file_key:
                     raise errors.MediaCreateMissingFileKeyError(media)
-                media_dicts.append(media.model_dump())
 
-        # 3. create the medias in HARI
+        # 3. create the medias in HARI, the whole batch is serialized to JSON at once
         return self._request(
             "POST",
             f"/datasets/{dataset_id}/medias:bulk",
-            json=media_dicts,
+            data=_MEDIA_CREATE_LIST_ADAPTER.dump_json(medias, serialize_as_any=True),
+            headers=_JSON_CONTENT_TYPE_HEADER,
             success_response_item_model=models.BulkResponse,
         )
 
@@ -1392,16 +1435,14 @@ class HARIClient:
                 limit=HARIClient.BULK_UPLOAD_LIMIT, found_amount=len(media_objects)
             )
 
-        # 1. parse media_objects to dicts before upload
-        media_object_dicts = [
-            media_object.model_dump() for media_object in media_objects
-        ]
-
-        # 2. send media_objects to HARI
+        # send media_objects to HARI, the whole batch is serialized to JSON at once
         return self._request(
             "POST",
             f"/datasets/{dataset_id}/mediaObjects:bulk",
-            json=media_object_dicts,
+            data=_MEDIA_OBJECT_CREATE_LIST_ADAPTER.dump_json(
+                media_objects, serialize_as_any=True
+            ),
+            headers=_JSON_CONTENT_TYPE_HEADER,
             success_response_item_model=models.BulkResponse,
         )
 
@@ -1806,6 +1847,156 @@ class HARIClient:
             success_response_item_model=models.ProcessingJob,
         )
 
+    def wait_for_processing_job(
+        self,
+        processing_job_id: uuid.UUID,
+        timeout: float | None = None,
+        initial_poll_interval: float = 0.5,
+        max_poll_interval: float = 10.0,
+    ) -> models.ProcessingJob:
+        """
+        Waits until a processing job has finished, either successfully or not.
+        The job is polled with an adaptive interval: it starts at initial_poll_interval
+        and grows by 50% after every poll up to max_poll_interval, so that short jobs
+        are detected as finished quickly, while long-running jobs aren't polled too often.
+
+        Args:
+            processing_job_id: The unique identifier of the processing job to wait for.
+            timeout: The maximum number of seconds to wait. Waits indefinitely if None.
+            initial_poll_interval: The number of seconds to wait before the second poll.
+            max_poll_interval: The maximum number of seconds to wait between two polls.
+
+        Raises:
+            APIException: If a request fails.
+            ProcessingJobTimeoutError: If the job didn't finish within the timeout.
+
+        Returns:
+            The finished ProcessingJob. Check its status to find out whether it succeeded.
+        """
+        return self._poll_processing_job(
+            processing_job_id=processing_job_id,
+            timeout=timeout,
+            deadline=None if timeout is None else time.monotonic() + timeout,
+            initial_poll_interval=initial_poll_interval,
+            max_poll_interval=max_poll_interval,
+        )
+
+    def _poll_processing_job(
+        self,
+        processing_job_id: uuid.UUID,
+        timeout: float | None,
+        deadline: float | None,
+        initial_poll_interval: float,
+        max_poll_interval: float,
+        stop_polling: threading.Event | None = None,
+    ) -> models.ProcessingJob | None:
+        """Polls a processing job until it has finished or the deadline has passed.
+
+        Args:
+            processing_job_id: The unique identifier of the processing job to wait for.
+            timeout: The timeout the deadline was computed from; used for the error message.
+            deadline: The time.monotonic() value after which polling is aborted.
+                Polls indefinitely if None.
+            initial_poll_interval: The number of seconds to wait before the second poll.
+            max_poll_interval: The maximum number of seconds to wait between two polls.
+            stop_polling: If given, polling stops as soon as this event is set.
+
+        Raises:
+            APIException: If a request fails.
+            ProcessingJobTimeoutError: If the job didn't finish before the deadline.
+
+        Returns:
+            The finished ProcessingJob, or None if polling was stopped with stop_polling.
+        """
+        poll_interval = initial_poll_interval
+        while True:
+            processing_job = self.get_processing_job(processing_job_id)
+            if processing_job.status not in [
+                models.ProcessingJobStatus.CREATED,
+                models.ProcessingJobStatus.RUNNING,
+            ]:
+                return processing_job
+
+            # add some jitter, so that many waiting clients don't poll in lockstep
+            sleep_duration = poll_interval * random.uniform(0.8, 1.2)
+            if deadline is not None:
+                remaining_time = deadline - time.monotonic()
+                if remaining_time <= 0:
+                    raise errors.ProcessingJobTimeoutError(
+                        processing_job_id=str(processing_job_id), timeout=timeout
+                    )
+                sleep_duration = min(sleep_duration, remaining_time)
+            if stop_polling is None:
+                time.sleep(sleep_duration)
+            elif stop_polling.wait(sleep_duration):
+                return None
+            poll_interval = min(max_poll_interval, poll_interval * 1.5)
+
+    def wait_for_processing_jobs(
+        self,
+        processing_job_ids: list[uuid.UUID],
+        timeout: float | None = None,
+        initial_poll_interval: float = 0.5,
+        max_poll_interval: float = 10.0,
+    ) -> list[models.ProcessingJob]:
+        """
+        Waits until all processing jobs have finished, either successfully or not.
+        The jobs are polled concurrently, each one like in `wait_for_processing_job`,
+        so waiting for multiple jobs takes as long as waiting for the slowest one.
+        As soon as polling one of the jobs fails, the others aren't polled anymore and
+        the error is raised.
+
+        Args:
+            processing_job_ids: The unique identifiers of the processing jobs to wait for.
+            timeout: The maximum number of seconds to wait for all jobs together.
+                Waits indefinitely if None.
+            initial_poll_interval: The number of seconds to wait before the second poll.
+            max_poll_interval: The maximum number of seconds to wait between two polls.
+
+        Raises:
+            APIException: If a request fails.
+            ProcessingJobTimeoutError: If a job didn't finish within the timeout.
+
+        Returns:
+            The finished ProcessingJobs in the order of processing_job_ids.
+        """
+        if len(processing_job_ids) == 0:
+            return []
+
+        # one deadline for all jobs, also for the ones that only start being polled
+        # when a worker becomes free
+        deadline = None if timeout is None else time.monotonic() + timeout
+        stop_polling = threading.Event()
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(len(processing_job_ids), HARIClient.CONNECTION_POOL_SIZE)
+        ) as executor:
+            processing_job_futures = [
+                executor.submit(
+                    self._poll_processing_job,
+                    processing_job_id=processing_job_id,
+                    timeout=timeout,
+                    deadline=deadline,
+                    initial_poll_interval=initial_poll_interval,
+                    max_poll_interval=max_poll_interval,
+                    stop_polling=stop_polling,
+                )
+                for processing_job_id in processing_job_ids
+            ]
+            try:
+                concurrent.futures.wait(
+                    processing_job_futures,
+                    return_when=concurrent.futures.FIRST_EXCEPTION,
+                )
+                for future in processing_job_futures:
+                    if future.done() and future.exception() is not None:
+                        # raises the exception
+                        future.result()
+                return [future.result() for future in processing_job_futures]
+            finally:
+                # stop polling the other jobs if one of them failed
+                stop_polling.set()
+                executor.shutdown(wait=True, cancel_futures=True)
+
     ### attributes ###
     def create_attributes(
         self,
@@ -1833,14 +2024,14 @@ class HARIClient:
                 limit=HARIClient.BULK_UPLOAD_LIMIT, found_amount=len(attributes)
             )
 
-        # 1. parse attributes to dicts before upload
-        attribute_dicts = [attribute.model_dump() for attribute in attributes]
-
-        # 2. send attributes to HARI
+        # send attributes to HARI, the whole batch is serialized to JSON at once
         return self._request(
             "POST",
             f"/datasets/{dataset_id}/attributes:bulk",
-            json=attribute_dicts,
+            data=_ATTRIBUTE_CREATE_LIST_ADAPTER.dump_json(
+                attributes, serialize_as_any=True
+            ),
+            headers=_JSON_CONTENT_TYPE_HEADER,
             success_response_item_model=models.BulkResponse,
         )
 
@@ -10,6 +10,7 @@ T = typing.TypeVar("T")
 class APIError(Exception):
     def __init__(self, response: requests.Response):
         http_response_status_code = response.status_code
+        self.status_code = http_response_status_code
         message = ""
         try:
             message = response.json()
@@ -103,6 +104,13 @@ class BulkOperationAnnotatableIdMissing(Exception):
         super().__init__(message)
 
 
+class ProcessingJobTimeoutError(Exception):
+    def __init__(self, processing_job_id: str, timeout: float):
+        super().__init__(
+            f"The processing job {processing_job_id} didn't finish within {timeout} seconds."
+        )
+
+
 class AttributeValidationInconsistentValueTypeError(Exception):
     def __init__(
         self, attribute_name: str, annotatable_type: str, found_value_types: list[str]
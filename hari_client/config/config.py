@@ -6,6 +6,11 @@ class HARIUploaderConfig(pydantic.BaseModel):
     media_upload_batch_size: int = pydantic.Field(default=30, ge=1, le=500)
     media_object_upload_batch_size: int = pydantic.Field(default=500, ge=1, le=500)
     attribute_upload_batch_size: int = pydantic.Field(default=500, ge=1, le=500)
+    # the number of media batches that are uploaded concurrently
+    max_parallel_batch_uploads: int = pydantic.Field(default=1, ge=1, le=16)
+    # how often a media or media object batch upload is retried after an error for which
+    # the request didn't reach the server (connection errors, 429 and 503)
+    max_upload_retries: int = pydantic.Field(default=3, ge=0, le=5)
 
 
 class Config(pydantic_settings.BaseSettings):
@@ -1,10 +1,19 @@
+import collections
+import concurrent.futures
 import copy
+import itertools
+import os
+import random
+import threading
+import time
 import typing
 import uuid
 
 import pydantic
-import tqdm
+import requests
+import urllib3
 
+from hari_client import errors
 from hari_client import HARIClient
 from hari_client import HARIUploaderConfig
 from hari_client import models
@@ -16,6 +25,17 @@ log = logger.setup_logger(__name__)
 # the maximum attributes number for the whole dataset/upload
 MAX_ATTR_COUNT = 1000
 
+# backoff settings (in seconds) for retrying batch uploads after recoverable errors
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+RETRY_JITTER = 0.5
+# http status codes of failed batch uploads that are worth retrying. Only codes for
+# which the server rejected the request without processing it are retried, because the
+# bulk create requests aren't idempotent.
+RECOVERABLE_HTTP_STATUS_CODES = {429, 503}
+
+T = typing.TypeVar("T")
+
 
 class HARIAttribute(models.BulkAttributeCreate):
     # overwrites the annotatable_id and _type fields to not be required,
@@ -64,17 +84,6 @@ class HARIMediaObject(models.BulkMediaObjectCreate):
             )
         return v
 
-    @pydantic.field_validator("back_reference")
-    @classmethod
-    def empty_back_reference(cls, v: str) -> str:
-        if not v:
-            log.warning(
-                "Detected empty back_reference in HARIMediaObject. It's encouraged "
-                "that you use a back_reference so that you can match HARI objects to"
-                " your own."
-            )
-        return v
-
 
 class HARIMediaUploadError(Exception):
     pass
@@ -164,16 +173,6 @@ class HARIMedia(models.BulkMediaCreate):
             )
         return v
 
-    @pydantic.field_validator("back_reference")
-    @classmethod
-    def empty_back_reference(cls, v: str) -> str:
-        if not v:
-            log.warning(
-                "Detected empty back_reference in HARIMedia. It's encouraged that you "
-                "use a back_reference so that you can match HARI objects to your own."
-            )
-        return v
-
 
 class HARIUploadResults(pydantic.BaseModel):
     medias: models.BulkResponse
@@ -202,6 +201,8 @@ class HARIUploader:
         self.object_categories = object_categories or set()
         self._config: HARIUploaderConfig = self.client.config.hari_uploader
         self._medias: list[HARIMedia] = []
+        # the back_reference sets only hold references to the strings of the added
+        # medias and media objects, so they don't duplicate the strings in memory
         self._media_back_references: set[str] = set()
         self._media_object_back_references: set[str] = set()
         self._media_object_cnt: int = 0
@@ -210,6 +211,10 @@ class HARIUploader:
         self._object_category_subsets: dict[str, str] = {}
         self._unique_attribute_ids: set[str] = set()
         self._with_media_files_upload: bool = True
+        # pre-generated bulk_operation_annotatable_ids; the lock is needed, because batches
+        # are uploaded concurrently
+        self._bulk_operation_annotatable_ids: list[str] = []
+        self._bulk_operation_annotatable_ids_lock = threading.Lock()
 
     # TODO: add_media shouldn't do validation logic, because that expects that a specific order of operation is necessary,
     # specifically that means that media_objects and attributes have to be added to media before the media is added to the uploader.
@@ -226,28 +231,45 @@ class HARIUploader:
             HARIMediaUploadError: If an unrecoverable problem with the media upload
                 was detected
         """
+        # bind the containers and methods used in the loops below to local names, because
+        # add_media is called for every media of potentially very large datasets
+        media_back_references = self._media_back_references
+        add_media_back_reference = media_back_references.add
+        media_object_back_references = self._media_object_back_references
+        add_media_object_back_reference = media_object_back_references.add
+        add_unique_attribute_id = self._unique_attribute_ids.add
+        media_object_cnt = 0
+        attribute_cnt = 0
+        # empty back_references are only counted to emit one warning for all of them
+        empty_media_back_reference_cnt = 0
+        empty_media_object_back_reference_cnt = 0
+
         for media in args:
             # check and remember media back_references
-            if media.back_reference in self._media_back_references:
+            if not media.back_reference:
+                empty_media_back_reference_cnt += 1
+            elif media.back_reference in media_back_references:
                 log.warning(
                     f"Found duplicate media back_reference: {media.back_reference}. If "
                     f"you want to be able to match HARI objects 1:1 to your own, "
                     f"consider using unique back_references."
                 )
             else:
-                self._media_back_references.add(media.back_reference)
+                add_media_back_reference(media.back_reference)
 
-            self._medias.append(media)
-            self._attribute_cnt += len(media.attributes)
+            attribute_cnt += len(media.attributes)
             for attr in media.attributes:
-                self._unique_attribute_ids.add(str(attr.id))
+                add_unique_attribute_id(str(attr.id))
                 # annotatable_type is optional for a HARIAttribute, but can already be set here
                 if not attr.annotatable_type:
                     attr.annotatable_type = models.DataBaseObjectType.MEDIA
 
             # check and remember media object back_references
+            media_object_cnt += len(media.media_objects)
             for media_object in media.media_objects:
-                if media_object.back_reference in self._media_object_back_references:
+                if not media_object.back_reference:
+                    empty_media_object_back_reference_cnt += 1
+                elif media_object.back_reference in media_object_back_references:
                     log.warning(
                         f"Found duplicate media_object back_reference: "
                         f"{media.back_reference}. If you want to be able to match HARI "
@@ -255,15 +277,31 @@ class HARIUploader:
                         f"back_references."
                     )
                 else:
-                    self._media_object_back_references.add(media_object.back_reference)
-                self._media_object_cnt += 1
-                self._attribute_cnt += len(media_object.attributes)
+                    add_media_object_back_reference(media_object.back_reference)
+                attribute_cnt += len(media_object.attributes)
                 for attr in media_object.attributes:
-                    self._unique_attribute_ids.add(str(attr.id))
+                    add_unique_attribute_id(str(attr.id))
                     # annotatable_type is optional for a HARIAttribute, but can already be set here
                     if not attr.annotatable_type:
                         attr.annotatable_type = models.DataBaseObjectType.MEDIAOBJECT
 
+        self._medias.extend(args)
+        self._media_object_cnt += media_object_cnt
+        self._attribute_cnt += attribute_cnt
+
+        if empty_media_back_reference_cnt:
+            log.warning(
+                f"Detected {empty_media_back_reference_cnt} HARIMedia(s) with empty "
+                f"back_reference. It's encouraged that you use a back_reference so "
+                f"that you can match HARI objects to your own."
+            )
+        if empty_media_object_back_reference_cnt:
+            log.warning(
+                f"Detected {empty_media_object_back_reference_cnt} HARIMediaObject(s) "
+                f"with empty back_reference. It's encouraged that you use a "
+                f"back_reference so that you can match HARI objects to your own."
+            )
+
     def _add_object_category_subset(self, object_category: str, subset_id: str) -> None:
         self._object_category_subsets[object_category] = subset_id
 
@@ -474,7 +512,11 @@ class HARIUploader:
 
         Returns:
             HARIUploadResults | None: All upload results and summaries for the
-            upload of medias and media_objects, or None if nothing was uploaded
+            upload of medias and media_objects, or None if nothing was uploaded.
+            After a successful upload the uploader's media state is reset: the
+            added medias, media objects and attributes are released, so calling
+            upload() again only uploads medias that were added with add_media()
+            in the meantime. If the upload raises, the added medias are kept.
 
         Raises:
             HARIUniqueAttributesLimitExceeded: If the number of unique attribute ids
@@ -504,56 +546,135 @@ class HARIUploader:
             f"{self._media_object_cnt} media_objects and {self._attribute_cnt} "
             f"attributes to HARI."
         )
+        # tqdm is only needed for the upload, so it's imported lazily to keep importing
+        # hari_client cheap for users who only build HARIMedia objects
+        import tqdm
+
+        # the progress bars are updated once per batch, so they're redrawn at most once per
+        # second; smoothing=0 shows the average rate, because batches complete irregularly
+        progress_bar_kwargs = {"mininterval": 1.0, "smoothing": 0}
         self._media_upload_progress = tqdm.tqdm(
-            desc="Media Upload", total=len(self._medias)
+            desc="Media Upload", total=len(self._medias), **progress_bar_kwargs
         )
         self._media_object_upload_progress = tqdm.tqdm(
-            desc="Media Object Upload", total=self._media_object_cnt
+            desc="Media Object Upload",
+            total=self._media_object_cnt,
+            **progress_bar_kwargs,
         )
         self._attribute_upload_progress = tqdm.tqdm(
-            desc="Attribute Upload", total=self._attribute_cnt
+            desc="Attribute Upload", total=self._attribute_cnt, **progress_bar_kwargs
         )
 
         media_upload_responses: list[models.BulkResponse] = []
         media_object_upload_responses: list[models.BulkResponse] = []
         attribute_upload_responses: list[models.BulkResponse] = []
 
-        for idx in range(0, len(self._medias), self._config.media_upload_batch_size):
-            medias_to_upload = self._medias[
-                idx : idx + self._config.media_upload_batch_size
-            ]
+        def collect_batch_results(
+            batch_future: concurrent.futures.Future,
+        ) -> None:
             (
                 media_response,
                 media_object_responses,
                 attribute_responses,
-            ) = self._upload_media_batch(medias_to_upload=medias_to_upload)
+            ) = batch_future.result()
             media_upload_responses.append(media_response)
             media_object_upload_responses.extend(media_object_responses)
             attribute_upload_responses.extend(attribute_responses)
 
+        # media batches are independent of each other, so they're uploaded concurrently
+        # by a bounded number of workers. Each worker uploads a media batch followed by
+        # its media_objects and attributes, so while one worker uploads the children of
+        # a batch, another one can already upload the next media batch.
+        # A new batch is only submitted when a worker is free, so that no more than
+        # max_parallel_batch_uploads batches are in flight when one of them fails.
+        # With a single worker, the batches are uploaded one after the other.
+        max_parallel_batch_uploads = self._config.max_parallel_batch_uploads
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_parallel_batch_uploads
+        ) as executor:
+            # the futures are collected in the order of the batches
+            batch_futures: collections.deque[
+                concurrent.futures.Future
+            ] = collections.deque()
+            try:
+                for medias_to_upload in _batched(
+                    self._medias, self._config.media_upload_batch_size
+                ):
+                    if len(batch_futures) >= max_parallel_batch_uploads:
+                        collect_batch_results(batch_futures.popleft())
+                    batch_futures.append(
+                        executor.submit(
+                            self._upload_media_batch_with_children,
+                            medias_to_upload=medias_to_upload,
+                        )
+                    )
+                while batch_futures:
+                    collect_batch_results(batch_futures.popleft())
+            except BaseException:
+                # don't start uploading any further batches if one of them failed
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+
         self._media_upload_progress.close()
         self._media_object_upload_progress.close()
         self._attribute_upload_progress.close()
 
+        # the uploaded medias aren't needed anymore, so they're released to free their memory
+        self._clear_medias()
+
         return HARIUploadResults(
             medias=_merge_bulk_responses(*media_upload_responses),
             media_objects=_merge_bulk_responses(*media_object_upload_responses),
             attributes=_merge_bulk_responses(*attribute_upload_responses),
         )
 
-    def _upload_media_batch(
+    def _clear_medias(self) -> None:
+        """Removes all added medias and the information collected about them."""
+        self._medias = []
+        self._media_back_references = set()
+        self._media_object_back_references = set()
+        self._media_object_cnt = 0
+        self._attribute_cnt = 0
+        self._unique_attribute_ids = set()
+
+    def _upload_media_batch_with_children(
         self, medias_to_upload: list[HARIMedia]
     ) -> tuple[
         models.BulkResponse, list[models.BulkResponse], list[models.BulkResponse]
     ]:
+        """Uploads a batch of medias followed by their media_objects and attributes.
+
+        Returns:
+            The media upload response, the media_object upload responses and the
+            attribute upload responses
+        """
+        media_upload_response = self._upload_media_batch(
+            medias_to_upload=medias_to_upload
+        )
+        (
+            media_object_upload_responses,
+            attribute_upload_responses,
+        ) = self._upload_media_batch_children(medias_to_upload=medias_to_upload)
+        return (
+            media_upload_response,
+            media_object_upload_responses,
+            attribute_upload_responses,
+        )
+
+    def _upload_media_batch(
+        self, medias_to_upload: list[HARIMedia]
+    ) -> models.BulkResponse:
         for media in medias_to_upload:
             self._set_bulk_operation_annotatable_id(item=media)
 
         # upload media batch
-        media_upload_response = self.client.create_medias(
-            dataset_id=self.dataset_id,
-            medias=medias_to_upload,
-            with_media_files_upload=self._with_media_files_upload,
+        media_upload_response = _retry_on_recoverable_error(
+            lambda: self.client.create_medias(
+                dataset_id=self.dataset_id,
+                medias=medias_to_upload,
+                with_media_files_upload=self._with_media_files_upload,
+            ),
+            max_retries=self._config.max_upload_retries,
         )
         self._media_upload_progress.update(len(medias_to_upload))
 
@@ -566,7 +687,12 @@ class HARIUploader:
             medias_to_upload=medias_to_upload,
             media_upload_bulk_response=media_upload_response,
         )
+        return media_upload_response
 
+    def _upload_media_batch_children(
+        self, medias_to_upload: list[HARIMedia]
+    ) -> tuple[list[models.BulkResponse], list[models.BulkResponse]]:
+        """Uploads the media_objects and attributes of an already uploaded batch of medias."""
         # upload media_objects of this batch of media in batches
         all_media_objects: list[HARIMediaObject] = []
         all_attributes: list[HARIAttribute] = []
@@ -583,20 +709,15 @@ class HARIUploader:
         # upload attributes of this batch of media in batches
         attributes_upload_responses = self._upload_attributes_in_batches(all_attributes)
 
-        return (
-            media_upload_response,
-            media_object_upload_responses,
-            attributes_upload_responses,
-        )
+        return media_object_upload_responses, attributes_upload_responses
 
     def _upload_attributes_in_batches(
         self, attributes: list[HARIAttribute]
     ) -> list[models.BulkResponse]:
         attributes_upload_responses: list[models.BulkResponse] = []
-        for idx in range(0, len(attributes), self._config.attribute_upload_batch_size):
-            attributes_to_upload = attributes[
-                idx : idx + self._config.attribute_upload_batch_size
-            ]
+        for attributes_to_upload in _batched(
+            attributes, self._config.attribute_upload_batch_size
+        ):
             response = self._upload_attribute_batch(
                 attributes_to_upload=attributes_to_upload
             )
@@ -608,12 +729,9 @@ class HARIUploader:
         self, media_objects: list[HARIMediaObject]
     ) -> list[models.BulkResponse]:
         media_object_upload_responses: list[models.BulkResponse] = []
-        for idx in range(
-            0, len(media_objects), self._config.media_object_upload_batch_size
+        for media_objects_to_upload in _batched(
+            media_objects, self._config.media_object_upload_batch_size
         ):
-            media_objects_to_upload = media_objects[
-                idx : idx + self._config.media_object_upload_batch_size
-            ]
             response = self._upload_media_object_batch(
                 media_objects_to_upload=media_objects_to_upload
             )
@@ -634,8 +752,11 @@ class HARIUploader:
     ) -> models.BulkResponse:
         for media_object in media_objects_to_upload:
             self._set_bulk_operation_annotatable_id(item=media_object)
-        response = self.client.create_media_objects(
-            dataset_id=self.dataset_id, media_objects=media_objects_to_upload
+        response = _retry_on_recoverable_error(
+            lambda: self.client.create_media_objects(
+                dataset_id=self.dataset_id, media_objects=media_objects_to_upload
+            ),
+            max_retries=self._config.max_upload_retries,
         )
         self._update_hari_attribute_media_object_ids(
             media_objects_to_upload=media_objects_to_upload,
@@ -648,18 +769,14 @@ class HARIUploader:
         medias_to_upload: list[HARIMedia],
         media_upload_bulk_response: models.BulkResponse,
     ) -> None:
+        results_by_bulk_operation_annotatable_id = (
+            _group_results_by_bulk_operation_annotatable_id(media_upload_bulk_response)
+        )
         for media in medias_to_upload:
             if len(media.media_objects) == 0:
                 continue
-            # from the endpoints we used, we know that the results items are of type
-            # models.AnnotatableCreateResponse, which contains
-            # the bulk_operation_annotatable_id.
-            filtered_upload_response = list(
-                filter(
-                    lambda x: x.bulk_operation_annotatable_id
-                    == media.bulk_operation_annotatable_id,
-                    media_upload_bulk_response.results,
-                )
+            filtered_upload_response = results_by_bulk_operation_annotatable_id.get(
+                media.bulk_operation_annotatable_id, []
             )
             if len(filtered_upload_response) == 0:
                 raise HARIMediaUploadError(
@@ -685,18 +802,16 @@ class HARIUploader:
         media_objects_to_upload: list[HARIMedia] | list[HARIMediaObject],
         media_object_upload_bulk_response: models.BulkResponse,
     ) -> None:
+        results_by_bulk_operation_annotatable_id = (
+            _group_results_by_bulk_operation_annotatable_id(
+                media_object_upload_bulk_response
+            )
+        )
         for media_object in media_objects_to_upload:
             if len(media_object.attributes) == 0:
                 continue
-            # from the endpoints we used, we know that the results items are of type
-            # models.AnnotatableCreateResponse, which contains
-            # the bulk_operation_annotatable_id.
-            filtered_upload_response = list(
-                filter(
-                    lambda x: x.bulk_operation_annotatable_id
-                    == media_object.bulk_operation_annotatable_id,
-                    media_object_upload_bulk_response.results,
-                )
+            filtered_upload_response = results_by_bulk_operation_annotatable_id.get(
+                media_object.bulk_operation_annotatable_id, []
             )
             if len(filtered_upload_response) == 0:
                 raise HARIMediaObjectUploadError(
@@ -726,18 +841,14 @@ class HARIUploader:
         medias_to_upload: list[HARIMedia] | list[HARIMediaObject],
         media_upload_bulk_response: models.BulkResponse,
     ) -> None:
+        results_by_bulk_operation_annotatable_id = (
+            _group_results_by_bulk_operation_annotatable_id(media_upload_bulk_response)
+        )
         for media in medias_to_upload:
             if len(media.attributes) == 0:
                 continue
-            # from the endpoints we used, we know that the results items are of type
-            # models.AnnotatableCreateResponse, which contains
-            # the bulk_operation_annotatable_id.
-            filtered_upload_response = list(
-                filter(
-                    lambda x: x.bulk_operation_annotatable_id
-                    == media.bulk_operation_annotatable_id,
-                    media_upload_bulk_response.results,
-                )
+            filtered_upload_response = results_by_bulk_operation_annotatable_id.get(
+                media.bulk_operation_annotatable_id, []
             )
 
             if len(filtered_upload_response) == 0:
@@ -761,7 +872,139 @@ class HARIUploader:
 
     def _set_bulk_operation_annotatable_id(self, item: HARIMedia | HARIMediaObject):
         if not item.bulk_operation_annotatable_id:
-            item.bulk_operation_annotatable_id = str(uuid.uuid4())
+            with self._bulk_operation_annotatable_ids_lock:
+                if not self._bulk_operation_annotatable_ids:
+                    self._bulk_operation_annotatable_ids = _generate_uuid_strings(
+                        HARIClient.BULK_UPLOAD_LIMIT
+                    )
+                item.bulk_operation_annotatable_id = (
+                    self._bulk_operation_annotatable_ids.pop()
+                )
+
+
+def _batched(items: typing.Iterable[T], batch_size: int) -> typing.Iterator[list[T]]:
+    """Splits items into consecutive batches of batch_size items; the last batch may be
+    smaller. The items are consumed lazily with an iterator instead of slicing them by index.
+
+    Args:
+        items: The items to split into batches
+        batch_size: The maximum number of items per batch
+
+    Yields:
+        list[T]: The next batch of items
+    """
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, batch_size)):
+        yield batch
+
+
+def _generate_uuid_strings(n: int) -> list[str]:
+    """Generates n random (version 4) uuid strings from a single read of random bytes,
+    instead of reading random bytes from the OS for every single uuid.
+
+    Args:
+        n: The number of uuids to generate
+
+    Returns:
+        list[str]: The uuid strings
+    """
+    random_bytes = os.urandom(16 * n)
+    return [
+        str(uuid.UUID(bytes=random_bytes[i * 16 : (i + 1) * 16], version=4))
+        for i in range(n)
+    ]
+
+
+def _group_results_by_bulk_operation_annotatable_id(
+    bulk_response: models.BulkResponse,
+) -> dict[str, list[models.AnnotatableCreateResponse]]:
+    """Groups the results of a BulkResponse by their bulk_operation_annotatable_id, so that
+    the result for an uploaded item can be looked up in constant time.
+
+    Args:
+        bulk_response: The BulkResponse of a media or media object upload
+
+    Returns:
+        A dict mapping every bulk_operation_annotatable_id to the results that contain it
+    """
+    results_by_bulk_operation_annotatable_id: dict[
+        str, list[models.AnnotatableCreateResponse]
+    ] = {}
+    # from the endpoints we used, we know that the results items are of type
+    # models.AnnotatableCreateResponse, which contains
+    # the bulk_operation_annotatable_id.
+    for result in bulk_response.results:
+        results_by_bulk_operation_annotatable_id.setdefault(
+            result.bulk_operation_annotatable_id, []
+        ).append(result)
+    return results_by_bulk_operation_annotatable_id
+
+
+def _is_recoverable_error(err: Exception) -> bool:
+    """Returns whether a failed request is worth retrying, i.e. the request provably
+    never reached the server: the connection couldn't be established or the server
+    rejected the request with 429 or 503.
+    Errors that may have occurred after the server received the request (e.g. read
+    timeouts, dropped connections, 502 and 504) aren't recoverable, because the server
+    may already have created the items of the batch. SSL and proxy errors aren't
+    recoverable either, because they aren't transient.
+    """
+    if isinstance(err, (requests.exceptions.SSLError, requests.exceptions.ProxyError)):
+        return False
+    if isinstance(err, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(err, requests.exceptions.ConnectionError):
+        return _is_connect_error(err)
+    return (
+        isinstance(err, errors.APIError)
+        and err.status_code in RECOVERABLE_HTTP_STATUS_CODES
+    )
+
+
+def _is_connect_error(err: requests.exceptions.ConnectionError) -> bool:
+    """Returns whether a ConnectionError was raised while establishing the connection,
+    e.g. because the connection was refused or the host couldn't be resolved.
+    """
+    reason = err.args[0] if err.args else None
+    # requests wraps urllib3's error in a MaxRetryError
+    if isinstance(reason, urllib3.exceptions.MaxRetryError):
+        reason = reason.reason
+    return isinstance(reason, urllib3.exceptions.NewConnectionError)
+
+
+def _retry_on_recoverable_error(func: typing.Callable[[], T], max_retries: int) -> T:
+    """
+    Calls func and retries it with exponential backoff and jitter if it raises a
+    recoverable error. Any other error is raised immediately.
+    Only errors for which the request never reached the server are retried, so that a
+    retry can't create the items of a batch twice.
+
+    Args:
+        func: The function to call
+        max_retries: The maximum number of retries after the first attempt
+
+    Returns:
+        The return value of func
+
+    Raises:
+        The error raised by func if it isn't recoverable or the retries are exhausted
+    """
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as err:
+            if attempt >= max_retries or not _is_recoverable_error(err):
+                raise
+            delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt) * (
+                1 + random.uniform(0, RETRY_JITTER)
+            )
+            attempt += 1
+            log.warning(
+                f"Upload request failed with a recoverable error, retrying in "
+                f"{delay:.1f}s ({attempt}/{max_retries}): {err}"
+            )
+            time.sleep(delay)
 
 
 def _merge_bulk_responses(*args: models.BulkResponse) -> models.BulkResponse:
@@ -785,26 +1028,33 @@ def _merge_bulk_responses(*args: models.BulkResponse) -> models.BulkResponse:
     if len(args) == 1:
         return args[0]
 
-    statuses = set()
+    first_status = args[0].status
+    has_mixed_statuses = False
+    has_successes = False
 
     for response in args:
-        # merge results
-        final_response.results.extend(response.results)
-
         # merge summaries
         final_response.summary.total += response.summary.total
         final_response.summary.successful += response.summary.successful
         final_response.summary.failed += response.summary.failed
 
-        statuses.add(response.status)
+        if response.status != first_status:
+            has_mixed_statuses = True
+        if response.status in (
+            models.BulkOperationStatusEnum.SUCCESS,
+            models.BulkOperationStatusEnum.PARTIAL_SUCCESS,
+        ):
+            has_successes = True
+
+    # merge results
+    final_response.results = list(
+        itertools.chain.from_iterable(response.results for response in args)
+    )
 
-    if len(statuses) == 1:
+    if not has_mixed_statuses:
         # if all statuses are the same, use that status
-        final_response.status = statuses.pop()
-    elif (
-        models.BulkOperationStatusEnum.SUCCESS
-        or models.BulkOperationStatusEnum.PARTIAL_SUCCESS in statuses
-    ):
+        final_response.status = first_status
+    elif has_successes:
         # if success appears at least once, it's a partial_success
         final_response.status = models.BulkOperationStatusEnum.PARTIAL_SUCCESS
     else:
@@ -32,6 +32,8 @@ def trigger_and_display_metadata_update(
 
     # track the status of all metadata rebuild jobs and wait for them to finish
     job_statuses = []
+    # poll often at first to detect short jobs quickly, then back off for long-running ones
+    poll_interval = 0.5
     jobs_are_still_running = True
     while jobs_are_still_running:
         jobs = hari.get_processing_jobs(trace_id=metadata_rebuild_trace_id)
@@ -49,7 +51,8 @@ def trigger_and_display_metadata_update(
         )
         if jobs_are_still_running:
             log.info(f"waiting for metadata_rebuild jobs to finish, {job_statuses=}")
-            time.sleep(10)
+            time.sleep(poll_interval)
+            poll_interval = min(10.0, poll_interval * 1.5)
 
     log.info(f"metadata_rebuild jobs finished with status {job_statuses=}")
 
@@ -1,4 +1,6 @@
+import datetime
 import json
+import time
 import uuid
 
 import pytest
@@ -7,6 +9,7 @@ from hari_client import errors
 from hari_client import HARIClient
 from hari_client import models
 from hari_client.client import client
+from hari_client.upload import hari_uploader
 
 
 def test_create_medias_with_missing_file_paths(test_client):
@@ -217,6 +220,10 @@ def test_create_medias_with_different_file_extensions_works(test_client, mocker)
         upload_file_spy.call_args_list[2].kwargs["file_path"] == "./my_test_media_2.png"
     )
 
+    # all files are uploaded with the client's media files upload session
+    for call in upload_file_spy.call_args_list:
+        assert call.kwargs["session"] is test_client._media_files_upload_session
+
 
 def test_create_medias_with_unidentifiable_file_extension(test_client):
     # Arrange
@@ -278,6 +285,91 @@ def test_create_media_objects_with_too_many_objects(test_client):
         )
 
 
+def test_create_media_objects_serializes_batch_like_model_dump(
+    test_client_mocked, mocker
+):
+    # Arrange
+    request_spy = mocker.spy(test_client_mocked, "_request")
+    media_objects = [
+        models.BulkMediaObjectCreate(
+            media_id="1234",
+            source=models.DataSource.REFERENCE,
+            back_reference=f"obj {i} - backref",
+            bulk_operation_annotatable_id=f"bulk_id_{i}",
+            object_category=uuid.UUID(int=i),
+            reference_data=models.Point2DXY(x=1.0 * i, y=2.0 * i),
+        )
+        for i in range(3)
+    ]
+
+    # Act
+    test_client_mocked.create_media_objects(
+        dataset_id=uuid.uuid4(), media_objects=media_objects
+    )
+
+    # Assert
+    request_kwargs = request_spy.call_args.kwargs
+    assert request_kwargs["headers"] == {"Content-Type": "application/json"}
+    assert json.loads(request_kwargs["data"]) == json.loads(
+        json.dumps(
+            [media_object.model_dump() for media_object in media_objects],
+            cls=client.CustomJSONEncoder,
+        )
+    )
+
+
+def test_create_medias_serializes_batch_like_model_dump(test_client_mocked, mocker):
+    # Arrange
+    request_spy = mocker.spy(test_client_mocked, "_request")
+    medias = [
+        hari_uploader.HARIMedia(
+            file_path=f"images/image_{i}.jpg",
+            file_key=f"images/image_{i}.jpg",
+            name=f"my image {i}",
+            media_type=models.MediaType.IMAGE,
+            back_reference=f"img {i}",
+            frame_timestamp=datetime.datetime(2025, 1, 2, 3, 4, 5, 6000 * i),
+            media_objects=[
+                hari_uploader.HARIMediaObject(
+                    source=models.DataSource.REFERENCE,
+                    back_reference=f"obj {i}",
+                    reference_data=models.Point2DXY(x=1.0, y=2.0),
+                )
+            ],
+            attributes=[
+                hari_uploader.HARIAttribute(
+                    id=uuid.uuid4(), name="my attribute", value=f"value {i}"
+                )
+            ],
+        )
+        for i in range(3)
+    ]
+    for i, media in enumerate(medias):
+        media.bulk_operation_annotatable_id = f"bulk_id_{i}"
+
+    # Act
+    test_client_mocked.create_medias(
+        dataset_id=uuid.uuid4(), medias=medias, with_media_files_upload=False
+    )
+
+    # Assert
+    request_kwargs = request_spy.call_args.kwargs
+    assert request_kwargs["headers"] == {"Content-Type": "application/json"}
+    payload = json.loads(request_kwargs["data"])
+    assert payload == json.loads(
+        json.dumps(
+            [media.model_dump() for media in medias],
+            cls=client.CustomJSONEncoder,
+        )
+    )
+    for i, media_payload in enumerate(payload):
+        assert "file_path" not in media_payload
+        assert "media_objects" not in media_payload
+        assert "attributes" not in media_payload
+        assert media_payload["bulk_operation_annotatable_id"] == f"bulk_id_{i}"
+    assert payload[1]["frame_timestamp"] == "2025-01-02T03:04:05.006000"
+
+
 def test_get_presigned_media_upload_url_batch_size_range(test_client):
     # Arrange
     client = test_client
@@ -592,3 +684,145 @@ def test_request_query_params_are_prepared_correctly(params, expected):
                 prepared_params[param_name], param_value
             ):
                 assert expected_param_value == prepared_param_value
+
+
+def _processing_job(
+    status: models.ProcessingJobStatus, processing_job_id: uuid.UUID = uuid.UUID(int=1)
+) -> models.ProcessingJob:
+    return models.ProcessingJob(
+        id=processing_job_id,
+        status=status,
+        process_name="metadata_rebuild",
+        details="",
+    )
+
+
+def test_wait_for_processing_job_polls_with_growing_interval(test_client, mocker):
+    # Arrange
+    sleep_mock = mocker.patch.object(client.time, "sleep")
+    get_processing_job_mock = mocker.patch.object(
+        test_client,
+        "get_processing_job",
+        side_effect=[
+            _processing_job(models.ProcessingJobStatus.CREATED),
+            _processing_job(models.ProcessingJobStatus.RUNNING),
+            _processing_job(models.ProcessingJobStatus.RUNNING),
+            _processing_job(models.ProcessingJobStatus.SUCCESS),
+        ],
+    )
+
+    # Act
+    processing_job = test_client.wait_for_processing_job(uuid.UUID(int=1))
+
+    # Assert
+    assert processing_job.status == models.ProcessingJobStatus.SUCCESS
+    assert get_processing_job_mock.call_count == 4
+    sleep_durations = [call.args[0] for call in sleep_mock.call_args_list]
+    assert len(sleep_durations) == 3
+    # 0.5s, 0.75s, 1.125s with +-20% jitter
+    for sleep_duration, expected_interval in zip(sleep_durations, [0.5, 0.75, 1.125]):
+        assert 0.8 * expected_interval <= sleep_duration <= 1.2 * expected_interval
+
+
+def test_wait_for_processing_job_returns_failed_job(test_client, mocker):
+    # Arrange
+    sleep_mock = mocker.patch.object(client.time, "sleep")
+    mocker.patch.object(
+        test_client,
+        "get_processing_job",
+        return_value=_processing_job(models.ProcessingJobStatus.FAILED),
+    )
+
+    # Act
+    processing_job = test_client.wait_for_processing_job(uuid.UUID(int=1))
+
+    # Assert
+    assert processing_job.status == models.ProcessingJobStatus.FAILED
+    assert sleep_mock.call_count == 0
+
+
+def test_wait_for_processing_job_raises_on_timeout(test_client, mocker):
+    # Arrange
+    mocker.patch.object(client.time, "sleep")
+    mocker.patch.object(client.time, "monotonic", side_effect=[0.0, 0.5, 2.0])
+    mocker.patch.object(
+        test_client,
+        "get_processing_job",
+        return_value=_processing_job(models.ProcessingJobStatus.RUNNING),
+    )
+
+    # Act + Assert
+    with pytest.raises(errors.ProcessingJobTimeoutError):
+        test_client.wait_for_processing_job(uuid.UUID(int=1), timeout=1.0)
+
+
+def test_wait_for_processing_jobs_waits_for_all_jobs(test_client, mocker):
+    # Arrange
+    processing_job_ids = [uuid.UUID(int=i) for i in range(3)]
+    # every job is running for i polls before it finishes
+    remaining_running_polls = {
+        processing_job_id: i for i, processing_job_id in enumerate(processing_job_ids)
+    }
+
+    def get_processing_job_mock(processing_job_id):
+        if remaining_running_polls[processing_job_id] > 0:
+            remaining_running_polls[processing_job_id] -= 1
+            return _processing_job(
+                models.ProcessingJobStatus.RUNNING, processing_job_id
+            )
+        return _processing_job(models.ProcessingJobStatus.SUCCESS, processing_job_id)
+
+    get_processing_job_spy = mocker.patch.object(
+        test_client, "get_processing_job", side_effect=get_processing_job_mock
+    )
+
+    # Act
+    processing_jobs = test_client.wait_for_processing_jobs(
+        processing_job_ids, initial_poll_interval=0.001
+    )
+
+    # Assert
+    assert [processing_job.id for processing_job in processing_jobs] == (
+        processing_job_ids
+    )
+    for processing_job in processing_jobs:
+        assert processing_job.status == models.ProcessingJobStatus.SUCCESS
+    assert get_processing_job_spy.call_count == 1 + 2 + 3
+
+
+def test_wait_for_processing_jobs_without_jobs(test_client):
+    assert test_client.wait_for_processing_jobs([]) == []
+
+
+def test_wait_for_processing_jobs_raises_first_error_and_stops_polling(
+    test_client, mocker
+):
+    # Arrange
+    failing_job_id = uuid.UUID(int=0)
+    running_job_id = uuid.UUID(int=1)
+    polling_error = errors.APIError(mocker.MagicMock(status_code=500))
+
+    def get_processing_job_mock(processing_job_id):
+        if processing_job_id == failing_job_id:
+            raise polling_error
+        # the other job never finishes
+        return _processing_job(models.ProcessingJobStatus.RUNNING, processing_job_id)
+
+    get_processing_job_mock = mocker.patch.object(
+        test_client, "get_processing_job", side_effect=get_processing_job_mock
+    )
+    start = time.monotonic()
+
+    # Act + Assert
+    with pytest.raises(errors.APIError) as exc_info:
+        test_client.wait_for_processing_jobs(
+            [failing_job_id, running_job_id], timeout=30, initial_poll_interval=0.05
+        )
+
+    # the error is raised right away instead of after the other job's timeout
+    assert exc_info.value is polling_error
+    assert time.monotonic() - start < 5
+    # the running job isn't polled anymore
+    call_count = get_processing_job_mock.call_count
+    time.sleep(0.2)
+    assert get_processing_job_mock.call_count == call_count
@@ -1,12 +1,29 @@
 import collections
+import threading
 import uuid
 
 import pytest
+import requests
+import urllib3
 
+from hari_client import errors
 from hari_client import hari_uploader
 from hari_client import models
 
 
+def test_hari_uploader_init_sets_object_categories(test_client):
+    # Act
+    uploader = hari_uploader.HARIUploader(
+        client=test_client,
+        dataset_id=uuid.UUID(int=0),
+        object_categories={"pedestrian", "wheel"},
+    )
+
+    # Assert
+    assert uploader.object_categories == {"pedestrian", "wheel"}
+    assert uploader._object_category_subsets == {}
+
+
 def test_add_media(mock_uploader_for_object_category_validation):
     # Arrange
     (
@@ -236,6 +253,50 @@ def test_update_hari_media_object_media_ids(
     uploader._media_object_cnt = 3
 
 
+@pytest.mark.parametrize(
+    "response_bulk_operation_annotatable_ids, error_match",
+    [
+        (["another_bulk_id"], "Couldn't find"),
+        (["bulk_id_1", "bulk_id_1"], "contains multiple items"),
+    ],
+)
+def test_update_hari_media_object_media_ids_with_unexpected_upload_response(
+    mock_uploader_for_object_category_validation,
+    response_bulk_operation_annotatable_ids,
+    error_match,
+):
+    # Arrange
+    uploader, _ = mock_uploader_for_object_category_validation
+    media = hari_uploader.HARIMedia(
+        name="my image 1",
+        media_type=models.MediaType.IMAGE,
+        back_reference="img_1",
+    )
+    media.bulk_operation_annotatable_id = "bulk_id_1"
+    media.add_media_object(
+        hari_uploader.HARIMediaObject(
+            source=models.DataSource.REFERENCE, back_reference="img_1_obj_1"
+        )
+    )
+    media_upload_bulk_response = models.BulkResponse(
+        results=[
+            models.AnnotatableCreateResponse(
+                item_id="new_media_id",
+                bulk_operation_annotatable_id=bulk_operation_annotatable_id,
+                status=models.ResponseStatesEnum.SUCCESS,
+            )
+            for bulk_operation_annotatable_id in response_bulk_operation_annotatable_ids
+        ]
+    )
+
+    # Act + Assert
+    with pytest.raises(hari_uploader.HARIMediaUploadError, match=error_match):
+        uploader._update_hari_media_object_media_ids(
+            medias_to_upload=[media],
+            media_upload_bulk_response=media_upload_bulk_response,
+        )
+
+
 def test_update_hari_attribute_media_ids(mock_uploader_for_object_category_validation):
     # Arrange
     (
@@ -451,6 +512,10 @@ def test_hari_uploader_creates_batches_correctly(mock_uploader_for_batching):
                 )
         uploader.add_media(media)
 
+    assert len(uploader._medias) == 1100
+    assert uploader._media_object_cnt == 2200
+    assert uploader._attribute_cnt == 6600
+
     # Act
     uploader.upload()
 
@@ -460,7 +525,6 @@ def test_hari_uploader_creates_batches_correctly(mock_uploader_for_batching):
     media_calls = media_spy.call_args_list
     for i in range(11):
         assert len(media_calls[i].kwargs["medias_to_upload"]) == 100
-    assert len(uploader._medias) == 1100
 
     assert media_object_spy.call_count == 22
     media_object_calls = media_object_spy.call_args_list
@@ -469,13 +533,117 @@ def test_hari_uploader_creates_batches_correctly(mock_uploader_for_batching):
             assert len(media_object_calls[i].kwargs["media_objects_to_upload"]) == 150
         else:
             assert len(media_object_calls[i].kwargs["media_objects_to_upload"]) == 50
-    assert uploader._media_object_cnt == 2200
 
     assert attribute_spy.call_count == 66
     attribute_calls = attribute_spy.call_args_list
     for i in range(66):
         assert len(attribute_calls[i].kwargs["attributes_to_upload"]) == 100
-    assert uploader._attribute_cnt == 6600
+
+
+def test_hari_uploader_uploads_batches_in_parallel(mock_uploader_for_batching, mocker):
+    # Arrange
+    uploader, media_spy, *_ = mock_uploader_for_batching
+
+    # 4 media batches with 2 of them in flight at a time
+    uploader._config.media_upload_batch_size = 100
+    uploader._config.max_parallel_batch_uploads = 2
+    # every create_medias call blocks until a second one is in flight, so the upload
+    # fails with a BrokenBarrierError if the batches are uploaded one after the other
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait_for_second_batch(**kwargs):
+        barrier.wait()
+        return mocker.DEFAULT
+
+    uploader.client.create_medias.side_effect = wait_for_second_batch
+    for i in range(400):
+        uploader.add_media(
+            hari_uploader.HARIMedia(
+                name=f"my image {i}",
+                media_type=models.MediaType.IMAGE,
+                back_reference=f"img_{i}",
+                file_path=f"images/image_{i}.jpg",
+            )
+        )
+
+    # Act
+    upload_results = uploader.upload()
+
+    # Assert
+    assert media_spy.call_count == 4
+    assert uploader.client.create_medias.call_count == 4
+    assert len(upload_results.medias.results) == 4 * 1100
+
+
+def test_hari_uploader_stops_parallel_upload_when_a_batch_fails(
+    mock_uploader_for_batching, mocker
+):
+    # Arrange
+    uploader, media_spy, *_ = mock_uploader_for_batching
+
+    # 5 media batches with 2 of them in flight at a time
+    uploader._config.media_upload_batch_size = 100
+    uploader._config.max_parallel_batch_uploads = 2
+    # a client error isn't retried
+    upload_error = errors.APIError(mocker.MagicMock(status_code=400))
+    create_medias_mock = uploader.client.create_medias
+    create_medias_mock.side_effect = [upload_error] + [mocker.DEFAULT] * 4
+    for i in range(500):
+        uploader.add_media(
+            hari_uploader.HARIMedia(
+                name=f"my image {i}",
+                media_type=models.MediaType.IMAGE,
+                back_reference=f"img_{i}",
+                file_path=f"images/image_{i}.jpg",
+            )
+        )
+
+    # Act + Assert
+    with pytest.raises(errors.APIError) as exc_info:
+        uploader.upload()
+    assert exc_info.value is upload_error
+    # at most the 2 batches in flight when the first one failed were uploaded; the
+    # second one may have been cancelled before it started. The remaining batches were
+    # never started.
+    assert 1 <= create_medias_mock.call_count <= 2
+    assert media_spy.call_count == create_medias_mock.call_count
+    # the medias are kept, because the upload didn't succeed
+    assert len(uploader._medias) == 500
+
+
+def test_hari_uploader_uploads_media_objects_of_a_batch_before_the_next_media_batch(
+    mock_uploader_for_batching, mocker
+):
+    # Arrange
+    uploader, *_ = mock_uploader_for_batching
+    # 3 media batches with the default of max_parallel_batch_uploads=1
+    uploader._config.media_upload_batch_size = 100
+    call_order = []
+    for method_name in ["create_medias", "create_media_objects"]:
+        getattr(uploader.client, method_name).side_effect = (
+            lambda method_name=method_name, **kwargs: call_order.append(method_name)
+            or mocker.DEFAULT
+        )
+    for i in range(300):
+        media = hari_uploader.HARIMedia(
+            name=f"my image {i}",
+            media_type=models.MediaType.IMAGE,
+            back_reference=f"img_{i}",
+            file_path=f"images/image_{i}.jpg",
+        )
+        media.add_media_object(
+            hari_uploader.HARIMediaObject(
+                source=models.DataSource.REFERENCE,
+                back_reference=f"img_{i}_obj",
+            )
+        )
+        uploader.add_media(media)
+
+    # Act
+    uploader.upload()
+
+    # Assert
+    assert call_order == ["create_medias", "create_media_objects"] * 3
 
 
 def test_hari_uploader_creates_single_batch_correctly(
@@ -530,6 +698,10 @@ def test_hari_uploader_creates_single_batch_correctly(
 
         uploader.add_media(media)
 
+    assert len(uploader._medias) == 5
+    assert uploader._media_object_cnt == 10
+    assert uploader._attribute_cnt == 30
+
     # Act
     uploader.upload()
 
@@ -538,17 +710,70 @@ def test_hari_uploader_creates_single_batch_correctly(
     assert media_spy.call_count == 1
     media_calls = media_spy.call_args_list
     assert len(media_calls[0].kwargs["medias_to_upload"]) == 5
-    assert len(uploader._medias) == 5
 
     assert media_object_spy.call_count == 1
     media_object_calls = media_object_spy.call_args_list
     assert len(media_object_calls[0].kwargs["media_objects_to_upload"]) == 10
-    assert uploader._media_object_cnt == 10
 
     assert attribute_spy.call_count == 1
     attribute_calls = attribute_spy.call_args_list
     assert len(attribute_calls[0].kwargs["attributes_to_upload"]) == 30
-    assert uploader._attribute_cnt == 30
+
+
+def test_hari_uploader_releases_medias_after_upload(
+    create_configurable_mock_uploader_successful_single_batch, mocker
+):
+    # Arrange
+    (
+        uploader,
+        _,
+        media_spy,
+        *_,
+    ) = create_configurable_mock_uploader_successful_single_batch(
+        dataset_id=uuid.UUID(int=0),
+        medias_cnt=1,
+        media_objects_cnt=1,
+        attributes_cnt=1,
+    )
+    media = hari_uploader.HARIMedia(
+        name="my image",
+        media_type=models.MediaType.IMAGE,
+        back_reference="img",
+        file_path="images/image.jpg",
+    )
+    media_object = hari_uploader.HARIMediaObject(
+        source=models.DataSource.REFERENCE, back_reference="img_obj"
+    )
+    media_object.add_attribute(
+        hari_uploader.HARIAttribute(id=uuid.uuid4(), name="attr", value="value")
+    )
+    media.add_media_object(media_object)
+    uploader.add_media(media)
+
+    # Act
+    uploader.upload()
+
+    # Assert
+    assert media_spy.call_count == 1
+    assert uploader._medias == []
+    assert uploader._media_back_references == set()
+    assert uploader._media_object_back_references == set()
+    assert uploader._media_object_cnt == 0
+    assert uploader._attribute_cnt == 0
+    assert uploader._unique_attribute_ids == set()
+
+    # the same back_reference can be added again without a duplicate warning
+    log_spy = mocker.spy(hari_uploader.log, "warning")
+    uploader.add_media(
+        hari_uploader.HARIMedia(
+            name="my image",
+            media_type=models.MediaType.IMAGE,
+            back_reference="img",
+            file_path="images/image.jpg",
+        )
+    )
+    assert log_spy.call_count == 0
+    assert len(uploader._medias) == 1
 
 
 def test_hari_uploader_creates_single_batch_correctly_without_uploading_media_files(
@@ -608,6 +833,10 @@ def test_hari_uploader_creates_single_batch_correctly_without_uploading_media_fi
 
         uploader.add_media(media)
 
+    assert len(uploader._medias) == 5
+    assert uploader._media_object_cnt == 10
+    assert uploader._attribute_cnt == 30
+
     # Act
     uploader.upload()
 
@@ -616,17 +845,14 @@ def test_hari_uploader_creates_single_batch_correctly_without_uploading_media_fi
     assert media_spy.call_count == 1
     media_calls = media_spy.call_args_list
     assert len(media_calls[0].kwargs["medias_to_upload"]) == 5
-    assert len(uploader._medias) == 5
 
     assert media_object_spy.call_count == 1
     media_object_calls = media_object_spy.call_args_list
     assert len(media_object_calls[0].kwargs["media_objects_to_upload"]) == 10
-    assert uploader._media_object_cnt == 10
 
     assert attribute_spy.call_count == 1
     attribute_calls = attribute_spy.call_args_list
     assert len(attribute_calls[0].kwargs["attributes_to_upload"]) == 30
-    assert uploader._attribute_cnt == 30
 
     # check client method spies
     assert client_create_medias_spy.call_count == 1
@@ -695,28 +921,51 @@ def test_warning_for_hari_uploader_receives_duplicate_media_object_back_referenc
     assert log_spy.call_count == 1
 
 
-def test_warning_for_media_without_back_reference(mocker):
+def test_warning_for_media_without_back_reference(
+    mock_uploader_for_object_category_validation, mocker
+):
     # Arrange
+    uploader, _ = mock_uploader_for_object_category_validation
     log_spy = mocker.spy(hari_uploader.log, "warning")
+    medias = [
+        hari_uploader.HARIMedia(
+            name=f"my image {i}", media_type=models.MediaType.IMAGE, back_reference=""
+        )
+        for i in range(3)
+    ]
 
     # Act
-    hari_uploader.HARIMedia(
-        name="my image 1", media_type=models.MediaType.IMAGE, back_reference=""
-    )
+    uploader.add_media(*medias)
 
     # Assert
+    # a single warning for all medias without back_reference
     assert log_spy.call_count == 1
+    assert "Detected 3 HARIMedia(s)" in log_spy.call_args.args[0]
 
 
-def test_warning_for_media_object_without_back_reference(mocker):
+def test_warning_for_media_object_without_back_reference(
+    mock_uploader_for_object_category_validation, mocker
+):
     # Arrange
+    uploader, _ = mock_uploader_for_object_category_validation
     log_spy = mocker.spy(hari_uploader.log, "warning")
+    media = hari_uploader.HARIMedia(
+        name="my image 1", media_type=models.MediaType.IMAGE, back_reference="img_1"
+    )
+    for _ in range(2):
+        media.add_media_object(
+            hari_uploader.HARIMediaObject(
+                source=models.DataSource.REFERENCE, back_reference=""
+            )
+        )
 
     # Act
-    hari_uploader.HARIMediaObject(source=models.DataSource.REFERENCE, back_reference="")
+    uploader.add_media(media)
 
     # Assert
+    # a single warning for all media_objects without back_reference
     assert log_spy.call_count == 1
+    assert "Detected 2 HARIMediaObject(s)" in log_spy.call_args.args[0]
 
 
 def test_hari_uploader_sets_bulk_operation_annotatable_id_automatically_on_medias(
@@ -753,6 +1002,37 @@ def test_hari_uploader_sets_bulk_operation_annotatable_id_automatically_on_media
     assert media.media_objects[0].media_id == "server_side_media_id"
 
 
+def test_set_bulk_operation_annotatable_id_uses_pre_generated_uuids(
+    mock_uploader_for_object_category_validation, mocker
+):
+    # Arrange
+    uploader, _ = mock_uploader_for_object_category_validation
+    urandom_spy = mocker.spy(hari_uploader.os, "urandom")
+    medias = [
+        hari_uploader.HARIMedia(
+            name=f"my image {i}",
+            media_type=models.MediaType.IMAGE,
+            back_reference=f"img_{i}",
+        )
+        for i in range(3)
+    ]
+    media_object = hari_uploader.HARIMediaObject(
+        source=models.DataSource.REFERENCE, back_reference="img_0_obj_0"
+    )
+
+    # Act
+    for item in [*medias, media_object]:
+        uploader._set_bulk_operation_annotatable_id(item=item)
+
+    # Assert
+    bulk_ids = [item.bulk_operation_annotatable_id for item in [*medias, media_object]]
+    assert len(set(bulk_ids)) == 4
+    for bulk_id in bulk_ids:
+        assert uuid.UUID(bulk_id).version == 4
+    # the random bytes for all uuids are read at once
+    assert urandom_spy.call_count == 1
+
+
 def test_hari_uploader_upload_without_specified_object_categories(mock_client, mocker):
     # Arrange
     uploader = hari_uploader.HARIUploader(mock_client[0], dataset_id=uuid.UUID(int=0))
@@ -1008,6 +1288,20 @@ def test_hari_uploader_upload_with_already_existing_backend_category_subsets(
             ],
             models.BulkResponse(status=models.BulkOperationStatusEnum.PARTIAL_SUCCESS),
         ),
+        (
+            [
+                models.BulkResponse(status=models.BulkOperationStatusEnum.FAILURE),
+                models.BulkResponse(status=models.BulkOperationStatusEnum.PROCESSING),
+            ],
+            models.BulkResponse(status=models.BulkOperationStatusEnum.FAILURE),
+        ),
+        (
+            [
+                models.BulkResponse(status=models.BulkOperationStatusEnum.SUCCESS),
+                models.BulkResponse(status=models.BulkOperationStatusEnum.PROCESSING),
+            ],
+            models.BulkResponse(status=models.BulkOperationStatusEnum.PARTIAL_SUCCESS),
+        ),
         (
             [
                 models.BulkResponse(
@@ -1123,6 +1417,170 @@ def test_merge_bulk_responses(
         assert actual_result.status == expected_result.status
 
 
+@pytest.mark.parametrize(
+    "items, batch_size, expected_batches",
+    [
+        ([], 2, []),
+        ([1, 2, 3, 4], 2, [[1, 2], [3, 4]]),
+        ([1, 2, 3, 4, 5], 2, [[1, 2], [3, 4], [5]]),
+        ([1, 2, 3], 5, [[1, 2, 3]]),
+    ],
+)
+def test_batched(items, batch_size, expected_batches):
+    assert list(hari_uploader._batched(items, batch_size)) == expected_batches
+
+
+def test_retry_on_recoverable_error_retries_until_success(mocker):
+    # Arrange
+    sleep_mock = mocker.patch.object(hari_uploader.time, "sleep")
+    func = mocker.Mock(
+        side_effect=[
+            errors.APIError(mocker.MagicMock(status_code=503)),
+            requests.exceptions.ConnectTimeout(),
+            # the connection was refused
+            requests.exceptions.ConnectionError(
+                urllib3.exceptions.MaxRetryError(
+                    pool=None,
+                    url="/",
+                    reason=urllib3.exceptions.NewConnectionError(
+                        None, "Connection refused"
+                    ),
+                )
+            ),
+            "success",
+        ]
+    )
+
+    # Act
+    result = hari_uploader._retry_on_recoverable_error(func, max_retries=3)
+
+    # Assert
+    assert result == "success"
+    assert func.call_count == 4
+    assert sleep_mock.call_count == 3
+    # exponential backoff with jitter
+    first_delay = sleep_mock.call_args_list[0].args[0]
+    second_delay = sleep_mock.call_args_list[1].args[0]
+    assert hari_uploader.RETRY_BASE_DELAY <= first_delay <= 1.5
+    assert 2 * hari_uploader.RETRY_BASE_DELAY <= second_delay <= 3.0
+
+
+def test_retry_on_recoverable_error_raises_when_retries_are_exhausted(mocker):
+    # Arrange
+    sleep_mock = mocker.patch.object(hari_uploader.time, "sleep")
+    func = mocker.Mock(side_effect=errors.APIError(mocker.MagicMock(status_code=429)))
+
+    # Act + Assert
+    with pytest.raises(errors.APIError):
+        hari_uploader._retry_on_recoverable_error(func, max_retries=2)
+    assert func.call_count == 3
+    assert sleep_mock.call_count == 2
+
+
+def test_retry_on_recoverable_error_fails_fast_on_client_errors(mocker):
+    # Arrange
+    sleep_mock = mocker.patch.object(hari_uploader.time, "sleep")
+    func = mocker.Mock(side_effect=errors.APIError(mocker.MagicMock(status_code=422)))
+
+    # Act + Assert
+    with pytest.raises(errors.APIError):
+        hari_uploader._retry_on_recoverable_error(func, max_retries=3)
+    assert func.call_count == 1
+    assert sleep_mock.call_count == 0
+
+
+@pytest.mark.parametrize("status_code", [502, 504])
+def test_retry_on_recoverable_error_doesnt_retry_gateway_errors(mocker, status_code):
+    # Arrange
+    sleep_mock = mocker.patch.object(hari_uploader.time, "sleep")
+    # the server may have created the items before the gateway failed
+    func = mocker.Mock(
+        side_effect=errors.APIError(mocker.MagicMock(status_code=status_code))
+    )
+
+    # Act + Assert
+    with pytest.raises(errors.APIError):
+        hari_uploader._retry_on_recoverable_error(func, max_retries=3)
+    assert func.call_count == 1
+    assert sleep_mock.call_count == 0
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        # the server may have created the items before the response failed
+        requests.exceptions.ReadTimeout(),
+        requests.exceptions.ConnectionError(
+            urllib3.exceptions.ProtocolError("Connection aborted.")
+        ),
+        # not transient
+        requests.exceptions.SSLError(),
+        requests.exceptions.ProxyError(),
+    ],
+)
+def test_retry_on_recoverable_error_doesnt_retry_errors_after_connecting(mocker, error):
+    # Arrange
+    sleep_mock = mocker.patch.object(hari_uploader.time, "sleep")
+    func = mocker.Mock(side_effect=error)
+
+    # Act + Assert
+    with pytest.raises(type(error)):
+        hari_uploader._retry_on_recoverable_error(func, max_retries=3)
+    assert func.call_count == 1
+    assert sleep_mock.call_count == 0
+
+
+def test_hari_uploader_retries_failed_media_batch_upload(
+    create_configurable_mock_uploader_successful_single_batch, mocker
+):
+    # Arrange
+    (
+        uploader,
+        client,
+        media_spy,
+        media_object_spy,
+        attribute_spy,
+        subset_create_spy,
+    ) = create_configurable_mock_uploader_successful_single_batch(
+        dataset_id=uuid.UUID(int=0),
+        medias_cnt=1,
+        media_objects_cnt=1,
+        attributes_cnt=0,
+    )
+    mocker.patch.object(hari_uploader.time, "sleep")
+    create_medias_mock = mocker.patch.object(
+        client,
+        "create_medias",
+        side_effect=[
+            errors.APIError(mocker.MagicMock(status_code=503)),
+            client.create_medias.return_value,
+        ],
+    )
+    media = hari_uploader.HARIMedia(
+        name="my image",
+        media_type=models.MediaType.IMAGE,
+        back_reference="img",
+        file_path="images/image.jpg",
+    )
+    media.add_media_object(
+        hari_uploader.HARIMediaObject(
+            source=models.DataSource.REFERENCE, back_reference="img_obj"
+        )
+    )
+    uploader.add_media(media)
+
+    # Act
+    upload_results = uploader.upload()
+
+    # Assert
+    assert create_medias_mock.call_count == 2
+    assert media_spy.call_count == 1
+    assert media_object_spy.call_count == 1
+    assert upload_results.medias.results[0].bulk_operation_annotatable_id == (
+        "bulk_media_id_0"
+    )
+
+
 def test_hari_uploader_unique_attributes_number_limit_error(
     mock_uploader_for_bulk_operation_annotatable_id_setter,
 ):
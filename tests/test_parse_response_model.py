@@ -6,6 +6,7 @@ import pytest
 
 from hari_client import errors
 from hari_client import models
+from hari_client.client.client import _get_type_adapter
 from hari_client.client.client import _parse_response_model
 
 
@@ -157,6 +158,29 @@ def test_parse_response_model_works_with_list_of_parametrized_generics(
         assert response[0].c == "hello"
 
 
+def test_parse_response_model_reuses_type_adapter_for_list_of_models():
+    _get_type_adapter.cache_clear()
+
+    for _ in range(3):
+        response = _parse_response_model(
+            response_data=[TestObject1, TestObject1],
+            response_model=list[SimpleModel1],
+        )
+        assert response == [SimpleModel1(**TestObject1), SimpleModel1(**TestObject1)]
+
+    cache_info = _get_type_adapter.cache_info()
+    assert cache_info.misses == 1
+    assert cache_info.hits == 2
+
+
+def test_parse_response_model_fails_for_list_of_models_with_invalid_item():
+    with pytest.raises(errors.ParseResponseModelError):
+        _parse_response_model(
+            response_data=[TestObject1, {"a": "not an int"}],
+            response_model=list[SimpleModel1],
+        )
+
+
 @pytest.mark.parametrize(
     "response_data, response_model, key_type, value_type",
     [
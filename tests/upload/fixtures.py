@@ -1,3 +1,6 @@
+import functools
+import itertools
+import threading
 import typing
 import uuid
 
@@ -8,8 +11,162 @@ from hari_client import HARIClient
 from hari_client import models
 
 
+_SUCCESS = models.ResponseStatesEnum.SUCCESS
+# the ids only have to be distinct within a test, so they're generated once per test run
+_PEDESTRIAN_SUBSET_ID = str(uuid.uuid4())
+_WHEEL_SUBSET_ID = str(uuid.uuid4())
+_ZERO_DATASET_ID = uuid.UUID(int=0)
+# the response of the mocked get_subsets_for_dataset, shared by all tests
+_DATASET_RESPONSE = models.DatasetResponse.model_construct(
+    id=_ZERO_DATASET_ID,
+    name="my dataset",
+    num_medias=1,
+    num_media_objects=1,
+    num_instances=1,
+    mediatype=models.MediaType.IMAGE,
+)
+
+
+# The bulk responses of the mocked client are built from these cached results, so that
+# their pydantic models are only constructed once per test run. The results are tuples,
+# so that they can't be modified by a test.
+# The mock data is known to be valid, so the models are constructed without validation.
+@functools.lru_cache(maxsize=None)
+def _annotatable_create_results(
+    bulk_id_prefix: str, n: int
+) -> tuple[models.AnnotatableCreateResponse, ...]:
+    # local names avoid the module attribute lookups for every item
+    construct = models.AnnotatableCreateResponse.model_construct
+    success = _SUCCESS
+    return tuple(
+        construct(status=success, bulk_operation_annotatable_id=f"{bulk_id_prefix}{i}")
+        for i in range(n)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _attribute_create_results(n: int) -> tuple[models.AttributeCreateResponse, ...]:
+    construct = models.AttributeCreateResponse.model_construct
+    success = _SUCCESS
+    return tuple(
+        construct(status=success, annotatable_id=f"bulk_attribute_id_{i}")
+        for i in range(n)
+    )
+
+
+# The bulk responses of the configurable uploader are shared by all tests using the same
+# counts, because neither the uploader nor the tests modify them.
+@functools.lru_cache(maxsize=32)
+def _media_bulk_response(n: int) -> models.BulkResponse:
+    return models.BulkResponse.model_construct(
+        results=list(_annotatable_create_results("bulk_media_id_", n))
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def _media_object_bulk_response(n: int) -> models.BulkResponse:
+    return models.BulkResponse.model_construct(
+        results=list(_annotatable_create_results("bulk_media_object_id_", n))
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def _attribute_bulk_response(n: int) -> models.BulkResponse:
+    return models.BulkResponse.model_construct(
+        results=list(_attribute_create_results(n))
+    )
+
+
+def _bulk_patch(
+    mocker,
+    monkeypatch: pytest.MonkeyPatch,
+    target: typing.Any,
+    specs: dict[str, dict[str, typing.Any]],
+) -> None:
+    """Patches multiple attributes of the target at once.
+    Attributes that only need a fixed return_value are replaced by a plain mock with
+    monkeypatch.setattr, which is cheaper than mocker.patch.object.
+    All other attributes (e.g. with a side_effect) are patched with mocker.patch.object.
+
+    Args:
+        mocker: The pytest-mock mocker fixture
+        monkeypatch: The pytest monkeypatch fixture
+        target: The object to patch
+        specs: Maps the attribute names to the keyword arguments for mocker.patch.object,
+            e.g. {"create_medias": {"return_value": models.BulkResponse()}}
+    """
+    for name, spec in specs.items():
+        if spec.keys() == {"return_value"}:
+            monkeypatch.setattr(
+                target, name, mocker.Mock(return_value=spec["return_value"])
+            )
+        else:
+            mocker.patch.object(target, name, **spec)
+
+
+class _CallCounter:
+    """A lightweight spy that only counts the calls of the wrapped callable.
+    Use mocker.spy instead, if a test needs to inspect the call arguments."""
+
+    def __init__(self, func: typing.Callable) -> None:
+        self._func = func
+        # the uploader may call the spied methods from multiple threads
+        self._lock = threading.Lock()
+        self.call_count = 0
+
+    def __call__(self, *args, **kwargs) -> typing.Any:
+        with self._lock:
+            self.call_count += 1
+        return self._func(*args, **kwargs)
+
+
+def _lightweight_spy(
+    monkeypatch: pytest.MonkeyPatch, target: typing.Any, name: str
+) -> _CallCounter:
+    """Replaces the attribute of the target with a _CallCounter wrapping it."""
+    spy = _CallCounter(getattr(target, name))
+    monkeypatch.setattr(target, name, spy)
+    return spy
+
+
+def _create_subset_side_effect(subset_ids: list[str]) -> typing.Iterator[str]:
+    """Side effect for the mocked HARIClient.create_empty_subset.
+    It returns the subset_ids in order and fails with a clear error instead of a bare
+    StopIteration, if the method is called more often than expected.
+    """
+    yield from subset_ids
+    raise AssertionError(
+        f"create_empty_subset was called more than {len(subset_ids)} times"
+    )
+
+
+def _create_bulk_id_setter_mock(
+    media_bulk_id_prefix: str, media_object_bulk_id_prefix: str
+) -> typing.Callable[[hari_uploader.HARIMedia | hari_uploader.HARIMediaObject], None]:
+    """Creates a mock for HARIUploader._set_bulk_operation_annotatable_id.
+    It sets continuous bulk ids, counted separately for medias and media objects,
+    e.g. "bulk_media_id_0", "bulk_media_id_1", ... for media_bulk_id_prefix="bulk_media_id_".
+    """
+    media_bulk_id_counter = itertools.count()
+    media_object_bulk_id_counter = itertools.count()
+
+    def id_setter_mock(
+        item: hari_uploader.HARIMedia | hari_uploader.HARIMediaObject,
+    ):
+        if isinstance(item, hari_uploader.HARIMedia):
+            item.bulk_operation_annotatable_id = (
+                f"{media_bulk_id_prefix}{next(media_bulk_id_counter)}"
+            )
+        elif isinstance(item, hari_uploader.HARIMediaObject):
+            item.bulk_operation_annotatable_id = (
+                f"{media_object_bulk_id_prefix}{next(media_object_bulk_id_counter)}"
+            )
+
+    return id_setter_mock
+
+
 @pytest.fixture()
-def mock_client(test_client, mocker) -> typing.Generator[HARIClient, list[str], None]:
+def mock_client(test_client, mocker, monkeypatch) -> tuple[HARIClient, list[str]]:
     """Sets up a basic uploader using object_categories
     Mocks the create_subset method to return random subset ids in lexicographical order.
     Mocks the get_attribute_metadata method to return an empty list.
@@ -18,14 +175,19 @@ def mock_client(test_client, mocker) -> typing.Generator[HARIClient, list[str],
         object_category_vs_subsets: dict[str, str] mapping object category names to their subset ids
     """
 
-    pedestrian_subset_id = str(uuid.uuid4())
-    wheel_subset_id = str(uuid.uuid4())
-    create_subset_return_val = [pedestrian_subset_id, wheel_subset_id]
-    mocker.patch.object(
-        test_client, "create_empty_subset", side_effect=create_subset_return_val
+    create_subset_return_val = [_PEDESTRIAN_SUBSET_ID, _WHEEL_SUBSET_ID]
+    _bulk_patch(
+        mocker,
+        monkeypatch,
+        test_client,
+        {
+            "create_empty_subset": {
+                "side_effect": _create_subset_side_effect(create_subset_return_val)
+            },
+            "get_attribute_metadata": {"return_value": []},
+        },
     )
-    mocker.patch.object(test_client, "get_attribute_metadata", return_value=[])
-    yield test_client, create_subset_return_val
+    return test_client, create_subset_return_val
 
 
 @pytest.fixture()
@@ -34,170 +196,124 @@ def mock_uploader_for_object_category_validation(mock_client):
     object_categories = ["pedestrian", "wheel"]
     uploader = hari_uploader.HARIUploader(
         client=client,
-        dataset_id=uuid.UUID(int=0),
+        dataset_id=_ZERO_DATASET_ID,
         object_categories=set(object_categories),
     )
 
-    assert uploader.object_categories == {
-        "pedestrian",
-        "wheel",
-    }
     # lexigraphically sorted object categories vs subset ids
-    object_categories_vs_subset_ids = {
-        object_category_name: subset_id
-        for object_category_name, subset_id in zip(
-            object_categories, create_subset_return_val
-        )
-    }
+    object_categories_vs_subset_ids = dict(
+        zip(object_categories, create_subset_return_val)
+    )
+    return uploader, object_categories_vs_subset_ids
+
+
+# The bulk responses for the batching tests are immutable data, so they're shared by all
+# tests of the session. Only the patching with them is done per test.
+@pytest.fixture(scope="session")
+def media_bulk_response_for_batching() -> models.BulkResponse:
+    return models.BulkResponse.model_construct(
+        results=list(_annotatable_create_results("bulk_id_", 1100))
+    )
+
 
-    assert uploader._object_category_subsets == {}
-    yield uploader, object_categories_vs_subset_ids
+@pytest.fixture(scope="session")
+def media_object_bulk_response_for_batching() -> models.BulkResponse:
+    return models.BulkResponse.model_construct(
+        results=list(_annotatable_create_results("bulk_id_", 2200))
+    )
 
 
 @pytest.fixture()
-def mock_uploader_for_batching(test_client, mocker):
+def mock_uploader_for_batching(
+    test_client,
+    mocker,
+    monkeypatch,
+    media_bulk_response_for_batching,
+    media_object_bulk_response_for_batching,
+):
     client = test_client
 
     # setup mock_client and mock_uploader that allow for testing the full upload method
-    mocker.patch.object(
-        client,
-        "create_medias",
-        return_value=models.BulkResponse(
-            results=[
-                models.AnnotatableCreateResponse(
-                    status=models.ResponseStatesEnum.SUCCESS,
-                    bulk_operation_annotatable_id=f"bulk_id_{i}",
-                )
-                for i in range(1100)
-            ]
-        ),
-    )
-    mocker.patch.object(
+    _bulk_patch(
+        mocker,
+        monkeypatch,
         client,
-        "create_media_objects",
-        return_value=models.BulkResponse(
-            results=[
-                models.AnnotatableCreateResponse(
-                    status=models.ResponseStatesEnum.SUCCESS,
-                    bulk_operation_annotatable_id=f"bulk_id_{i}",
+        {
+            "create_medias": {"return_value": media_bulk_response_for_batching},
+            "create_media_objects": {
+                "return_value": media_object_bulk_response_for_batching
+            },
+            "create_attributes": {"return_value": models.BulkResponse()},
+            "get_attribute_metadata": {"return_value": []},
+            "create_empty_subset": {
+                "side_effect": _create_subset_side_effect(
+                    [_PEDESTRIAN_SUBSET_ID, _WHEEL_SUBSET_ID]
                 )
-                for i in range(2200)
-            ]
-        ),
-    )
-    mocker.patch.object(client, "create_attributes", return_value=models.BulkResponse())
-    mocker.patch.object(client, "get_attribute_metadata", return_value=[])
-    pedestrian_subset_id = str(uuid.uuid4())
-    wheel_subset_id = str(uuid.uuid4())
-    object_categories = {"pedestrian", "wheel"}
-
-    mocker.patch.object(
-        client,
-        "create_empty_subset",
-        side_effect=[pedestrian_subset_id, wheel_subset_id],
-    )
-    dataset_response = models.DatasetResponse(
-        id=uuid.UUID(int=0),
-        name="my dataset",
-        num_medias=1,
-        num_media_objects=1,
-        num_instances=1,
-        mediatype=models.MediaType.IMAGE,
-    )
-    mocker.patch.object(
-        client,
-        "get_subsets_for_dataset",
-        side_effect=[
-            [dataset_response],
-        ],
+            },
+            "get_subsets_for_dataset": {"side_effect": [[_DATASET_RESPONSE]]},
+        },
     )
     uploader = hari_uploader.HARIUploader(
         client=client,
-        dataset_id=uuid.UUID(int=0),
+        dataset_id=_ZERO_DATASET_ID,
     )
 
-    # there are multiple batches of medias and media objects, but the bulk_ids for the medias are expected to be continuous
-    # as implemented in the create_medias mock above.
-    global running_media_bulk_id
-    running_media_bulk_id = 0
-    global running_media_object_bulk_id
-    running_media_object_bulk_id = 0
-
-    def id_setter_mock(
-        item: hari_uploader.HARIMedia | hari_uploader.HARIMediaObject,
-    ):
-        global running_media_bulk_id
-        global running_media_object_bulk_id
-        if isinstance(item, hari_uploader.HARIMedia):
-            item.bulk_operation_annotatable_id = f"bulk_id_{running_media_bulk_id}"
-            running_media_bulk_id += 1
-        elif isinstance(item, hari_uploader.HARIMediaObject):
-            item.bulk_operation_annotatable_id = (
-                f"bulk_id_{running_media_object_bulk_id}"
-            )
-            running_media_object_bulk_id += 1
-
     media_spy = mocker.spy(uploader, "_upload_media_batch")
     media_object_spy = mocker.spy(uploader, "_upload_media_object_batch")
     attribute_spy = mocker.spy(uploader, "_upload_attribute_batch")
 
-    mocker.patch.object(
+    _bulk_patch(
+        mocker,
+        monkeypatch,
         uploader,
-        "_set_bulk_operation_annotatable_id",
-        side_effect=id_setter_mock,
+        {
+            # there are multiple batches of medias and media objects, but the bulk_ids for the medias are expected to be continuous
+            # as implemented in the create_medias mock above.
+            "_set_bulk_operation_annotatable_id": {
+                "side_effect": _create_bulk_id_setter_mock("bulk_id_", "bulk_id_")
+            },
+            "_load_dataset": {"return_value": None},
+        },
     )
 
-    mocker.patch.object(uploader, "_load_dataset", return_value=None)
-
-    yield uploader, media_spy, media_object_spy, attribute_spy
+    return uploader, media_spy, media_object_spy, attribute_spy
 
 
 @pytest.fixture()
-def mock_uploader_for_bulk_operation_annotatable_id_setter(test_client, mocker):
+def mock_uploader_for_bulk_operation_annotatable_id_setter(
+    test_client, mocker, monkeypatch
+):
     client = test_client
 
-    mocker.patch.object(
+    _bulk_patch(
+        mocker,
+        monkeypatch,
         client,
-        "create_medias",
-        return_value=models.BulkResponse(
-            results=[
-                models.AnnotatableCreateResponse(
-                    status=models.ResponseStatesEnum.SUCCESS,
-                    item_id="server_side_media_id",
-                    bulk_operation_annotatable_id="bulk_id",
+        {
+            "create_medias": {
+                "return_value": models.BulkResponse(
+                    results=[
+                        models.AnnotatableCreateResponse(
+                            status=models.ResponseStatesEnum.SUCCESS,
+                            item_id="server_side_media_id",
+                            bulk_operation_annotatable_id="bulk_id",
+                        )
+                    ]
                 )
-            ]
-        ),
-    )
-    mocker.patch.object(
-        client, "create_media_objects", return_value=models.BulkResponse()
-    )
-    mocker.patch.object(client, "get_attribute_metadata", return_value=[])
-    pedestrian_subset_id = str(uuid.uuid4())
-    wheel_subset_id = str(uuid.uuid4())
-    mocker.patch.object(
-        client,
-        "create_empty_subset",
-        side_effect=[pedestrian_subset_id, wheel_subset_id],
-    )
-    dataset_response = models.DatasetResponse(
-        id=uuid.UUID(int=0),
-        name="my dataset",
-        num_medias=1,
-        num_media_objects=1,
-        num_instances=1,
-        mediatype=models.MediaType.IMAGE,
-    )
-    mocker.patch.object(
-        client,
-        "get_subsets_for_dataset",
-        side_effect=[
-            [dataset_response],
-        ],
+            },
+            "create_media_objects": {"return_value": models.BulkResponse()},
+            "get_attribute_metadata": {"return_value": []},
+            "create_empty_subset": {
+                "side_effect": _create_subset_side_effect(
+                    [_PEDESTRIAN_SUBSET_ID, _WHEEL_SUBSET_ID]
+                )
+            },
+            "get_subsets_for_dataset": {"side_effect": [[_DATASET_RESPONSE]]},
+        },
     )
     uploader = hari_uploader.HARIUploader(
         client=client,
-        dataset_id=uuid.UUID(int=0),
+        dataset_id=_ZERO_DATASET_ID,
     )
 
     def id_setter_mock(
@@ -205,20 +321,103 @@ def mock_uploader_for_bulk_operation_annotatable_id_setter(test_client, mocker):
     ):
         item.bulk_operation_annotatable_id = "bulk_id"
 
-    mocker.patch.object(
+    _bulk_patch(
+        mocker,
+        monkeypatch,
         uploader,
-        "_set_bulk_operation_annotatable_id",
-        side_effect=id_setter_mock,
+        {
+            "_set_bulk_operation_annotatable_id": {"side_effect": id_setter_mock},
+            "_load_dataset": {"return_value": None},
+        },
+    )
+    # the spy wraps the patched id setter, so it has to be created after patching
+    id_setter_spy = _lightweight_spy(
+        monkeypatch, uploader, "_set_bulk_operation_annotatable_id"
     )
-    id_setter_spy = mocker.spy(uploader, "_set_bulk_operation_annotatable_id")
-
-    mocker.patch.object(uploader, "_load_dataset", return_value=None)
 
     return uploader, id_setter_spy
 
 
+def _build_uploader(
+    mocker,
+    monkeypatch: pytest.MonkeyPatch,
+    test_client: HARIClient,
+    dataset_id: uuid.UUID,
+    medias_cnt: int,
+    media_objects_cnt: int,
+    attributes_cnt: int,
+    object_categories: set[str] | None = None,
+    create_subset_side_effect: list[str] | None = None,
+    get_subsets_for_dataset_side_effect: list[list[models.DatasetResponse]]
+    | None = None,
+) -> tuple[
+    hari_uploader.HARIUploader,
+    HARIClient,
+    typing.Any,
+    typing.Any,
+    typing.Any,
+    typing.Any,
+]:
+    """Sets up the mocks and the uploader for the
+    create_configurable_mock_uploader_successful_single_batch fixture."""
+    if get_subsets_for_dataset_side_effect is None:
+        get_subsets_for_dataset_side_effect = [[]]
+
+    client_patches = {
+        "create_medias": {"return_value": _media_bulk_response(medias_cnt)},
+        "create_media_objects": {
+            "return_value": _media_object_bulk_response(media_objects_cnt)
+        },
+        "create_attributes": {"return_value": _attribute_bulk_response(attributes_cnt)},
+        "get_attribute_metadata": {"return_value": []},
+        "get_subsets_for_dataset": {"side_effect": get_subsets_for_dataset_side_effect},
+    }
+    if create_subset_side_effect is not None:
+        client_patches["create_empty_subset"] = {
+            "side_effect": create_subset_side_effect
+        }
+    _bulk_patch(mocker, monkeypatch, test_client, client_patches)
+
+    uploader = hari_uploader.HARIUploader(
+        client=test_client,
+        dataset_id=dataset_id,
+        object_categories=object_categories,
+    )
+
+    _bulk_patch(
+        mocker,
+        monkeypatch,
+        uploader,
+        {
+            "_set_bulk_operation_annotatable_id": {
+                "side_effect": _create_bulk_id_setter_mock(
+                    "bulk_media_id_", "bulk_media_object_id_"
+                )
+            },
+            "_load_dataset": {"return_value": None},
+        },
+    )
+    media_spy = mocker.spy(uploader, "_upload_media_batch")
+    media_object_spy = mocker.spy(uploader, "_upload_media_object_batch")
+    attribute_spy = mocker.spy(uploader, "_upload_attribute_batch")
+    subset_create_spy = _lightweight_spy(
+        monkeypatch, test_client, "create_empty_subset"
+    )
+
+    return (
+        uploader,
+        test_client,
+        media_spy,
+        media_object_spy,
+        attribute_spy,
+        subset_create_spy,
+    )
+
+
 @pytest.fixture()
-def create_configurable_mock_uploader_successful_single_batch(mocker, test_client):
+def create_configurable_mock_uploader_successful_single_batch(
+    mocker, monkeypatch, test_client
+):
     """Creates a configurable mock uploader for a successful upload of a single batch of medias, media objects and attributes.
         The number of medias, media objects and attributes can be configured, as well as the object categories and their corresponding
         subset_ids which are mocked to be created successfully.
@@ -243,121 +442,4 @@ def create_configurable_mock_uploader_successful_single_batch(mocker, test_clien
      - _upload_attribute_batch
     """
 
-    def _create_uploader(
-        dataset_id: uuid.UUID,
-        medias_cnt: int,
-        media_objects_cnt: int,
-        attributes_cnt: int,
-        object_categories: set[str] | None = None,
-        create_subset_side_effect: list[str] | None = None,
-        get_subsets_for_dataset_side_effect: list[list[models.DatasetResponse]] = [[]],
-    ) -> tuple[
-        hari_uploader.HARIUploader,
-        HARIClient,
-        typing.Any,
-        typing.Any,
-        typing.Any,
-        typing.Any,
-    ]:
-        mocker.patch.object(
-            test_client,
-            "create_medias",
-            return_value=models.BulkResponse(
-                results=[
-                    models.AnnotatableCreateResponse(
-                        status=models.ResponseStatesEnum.SUCCESS,
-                        bulk_operation_annotatable_id=f"bulk_media_id_{i}",
-                    )
-                    for i in range(medias_cnt)
-                ]
-            ),
-        )
-        mocker.patch.object(
-            test_client,
-            "create_media_objects",
-            return_value=models.BulkResponse(
-                results=[
-                    models.AnnotatableCreateResponse(
-                        status=models.ResponseStatesEnum.SUCCESS,
-                        bulk_operation_annotatable_id=f"bulk_media_object_id_{i}",
-                    )
-                    for i in range(media_objects_cnt)
-                ]
-            ),
-        )
-        mocker.patch.object(
-            test_client,
-            "create_attributes",
-            return_value=models.BulkResponse(
-                results=[
-                    models.AttributeCreateResponse(
-                        status=models.ResponseStatesEnum.SUCCESS,
-                        annotatable_id=f"bulk_attribute_id_{i}",
-                    )
-                    for i in range(attributes_cnt)
-                ]
-            ),
-        )
-        mocker.patch.object(test_client, "get_attribute_metadata", return_value=[])
-
-        if create_subset_side_effect is not None:
-            mocker.patch.object(
-                test_client,
-                "create_empty_subset",
-                side_effect=create_subset_side_effect,
-            )
-
-        mocker.patch.object(
-            test_client,
-            "get_subsets_for_dataset",
-            side_effect=get_subsets_for_dataset_side_effect,
-        )
-
-        uploader = hari_uploader.HARIUploader(
-            client=test_client,
-            dataset_id=dataset_id,
-            object_categories=object_categories,
-        )
-
-        global running_media_bulk_id
-        running_media_bulk_id = 0
-        global running_media_object_bulk_id
-        running_media_object_bulk_id = 0
-
-        def id_setter_mock(
-            item: hari_uploader.HARIMedia | hari_uploader.HARIMediaObject,
-        ):
-            global running_media_bulk_id
-            global running_media_object_bulk_id
-            if isinstance(item, hari_uploader.HARIMedia):
-                item.bulk_operation_annotatable_id = (
-                    f"bulk_media_id_{running_media_bulk_id}"
-                )
-                running_media_bulk_id += 1
-            elif isinstance(item, hari_uploader.HARIMediaObject):
-                item.bulk_operation_annotatable_id = (
-                    f"bulk_media_object_id_{running_media_object_bulk_id}"
-                )
-                running_media_object_bulk_id += 1
-
-        mocker.patch.object(
-            uploader,
-            "_set_bulk_operation_annotatable_id",
-            side_effect=id_setter_mock,
-        )
-        mocker.patch.object(uploader, "_load_dataset", return_value=None)
-        media_spy = mocker.spy(uploader, "_upload_media_batch")
-        media_object_spy = mocker.spy(uploader, "_upload_media_object_batch")
-        attribute_spy = mocker.spy(uploader, "_upload_attribute_batch")
-        subset_create_spy = mocker.spy(test_client, "create_empty_subset")
-
-        return (
-            uploader,
-            test_client,
-            media_spy,
-            media_object_spy,
-            attribute_spy,
-            subset_create_spy,
-        )
-
-    return _create_uploader
+    return functools.partial(_build_uploader, mocker, monkeypatch, test_client)